@@ -5,23 +5,41 @@ import hashlib
 import html
 import json
 import secrets
-import threading
+import selectors
+import socket
 import time
 import urllib.parse
 import webbrowser
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
 import httpx
 
 
 CALLBACK_TIMEOUT = 60  # seconds to wait for browser callback
+CALLBACK_READ_TIMEOUT = 5  # seconds to wait for a request on an accepted connection
+CALLBACK_MAX_REQUEST = 8192  # bytes of request head read from the browser
+HTTP_TIMEOUT = 10  # seconds for OAuth HTTP requests
+METADATA_TTL = 300  # seconds to reuse discovered OAuth metadata
+
+_client: Optional[httpx.Client] = None
+# auth base URL -> (fetched at, metadata)
+_metadata_cache: Dict[str, Tuple[float, dict]] = {}
 
 
 class OAuthError(Exception):
     """Raised when an OAuth operation fails."""
 
 
+def _http_client() -> httpx.Client:
+    """Return the shared HTTP client, so OAuth calls reuse one connection pool."""
+    global _client
+    if _client is None:
+        _client = httpx.Client(timeout=HTTP_TIMEOUT)
+    return _client
+
+
+@lru_cache(maxsize=256)
 def _auth_base_url(server_url: str) -> str:
     """Extract scheme + host from server URL (strip path per MCP spec)."""
     parsed = urllib.parse.urlparse(server_url)
@@ -33,19 +51,43 @@ def discover_metadata(server_url: str) -> dict:
 
     Tries /.well-known/oauth-authorization-server first.
     Falls back to sensible defaults if 404.
+    Answers are reused for METADATA_TTL seconds per authorization server.
     """
     base = _auth_base_url(server_url)
+    cached = _metadata_cache.get(base)
+    if cached and time.monotonic() - cached[0] < METADATA_TTL:
+        return dict(cached[1])
+
+    meta = _fetch_metadata(base)
+    if meta is not None:
+        _metadata_cache[base] = (time.monotonic(), meta)
+        return dict(meta)
+    # Network error — fall back to defaults, but try again next time
+    return _default_metadata(base)
+
+
+def _clear_metadata_cache() -> None:
+    """Forget all discovered metadata."""
+    _metadata_cache.clear()
+
+
+def _default_metadata(base: str) -> dict:
+    """Endpoints assumed when the server publishes no metadata."""
+    return {
+        "authorization_endpoint": f"{base}/authorize",
+        "token_endpoint": f"{base}/token",
+        "registration_endpoint": f"{base}/register",
+    }
+
+
+def _fetch_metadata(base: str) -> Optional[dict]:
+    """Request metadata from the server; None if it could not be reached."""
     url = f"{base}/.well-known/oauth-authorization-server"
 
     try:
-        resp = httpx.get(url, follow_redirects=True, timeout=10)
+        resp = _http_client().get(url, follow_redirects=True)
     except httpx.HTTPError:
-        # Network error — fall back to defaults
-        return {
-            "authorization_endpoint": f"{base}/authorize",
-            "token_endpoint": f"{base}/token",
-            "registration_endpoint": f"{base}/register",
-        }
+        return None
 
     if resp.status_code == 200:
         try:
@@ -54,11 +96,7 @@ def discover_metadata(server_url: str) -> dict:
             raise OAuthError("Invalid JSON in OAuth metadata response") from exc
 
     if resp.status_code == 404:
-        return {
-            "authorization_endpoint": f"{base}/authorize",
-            "token_endpoint": f"{base}/token",
-            "registration_endpoint": f"{base}/register",
-        }
+        return _default_metadata(base)
 
     raise OAuthError(
         f"Failed to fetch OAuth metadata ({resp.status_code}): {resp.text}"
@@ -78,11 +116,7 @@ def register_client(registration_endpoint: str, redirect_uri: str) -> dict:
         "token_endpoint_auth_method": "none",
     }
 
-    resp = httpx.post(
-        registration_endpoint,
-        json=payload,
-        timeout=10,
-    )
+    resp = _http_client().post(registration_endpoint, json=payload)
     if resp.status_code not in (200, 201):
         raise OAuthError(
             f"Client registration failed ({resp.status_code}): {resp.text}"
@@ -100,80 +134,116 @@ def register_client(registration_endpoint: str, redirect_uri: str) -> dict:
 # Local callback server
 # ---------------------------------------------------------------------------
 
-class _CallbackHandler(BaseHTTPRequestHandler):
-    """Tiny HTTP handler that captures the OAuth callback."""
-
-    # Shared across instances via class attrs set before serve_forever()
-    auth_code: Optional[str] = None
-    auth_error: Optional[str] = None
-    expected_state: Optional[str] = None
-
-    def do_GET(self):  # noqa: N802
-        parsed = urllib.parse.urlparse(self.path)
-        params = urllib.parse.parse_qs(parsed.query)
-
-        if parsed.path != "/callback":
-            self.send_response(404)
-            self.end_headers()
-            return
-
-        # Validate state
-        state = params.get("state", [None])[0]
-        if state != self.expected_state:
-            _CallbackHandler.auth_error = "State mismatch"
-            self._respond("Authorization failed: state mismatch.")
-            return
-
-        error = params.get("error", [None])[0]
-        if error:
-            desc = params.get("error_description", [error])[0]
-            _CallbackHandler.auth_error = desc
-            self._respond(f"Authorization failed: {desc}")
-            return
-
-        code = params.get("code", [None])[0]
-        if not code:
-            _CallbackHandler.auth_error = "No authorization code received"
-            self._respond("Authorization failed: no code received.")
-            return
-
-        _CallbackHandler.auth_code = code
-        self._respond("Authorization successful! You can close this tab.")
-
-    def _respond(self, body: str):
-        self.send_response(200)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.end_headers()
-        safe_body = html.escape(body)
-        page = (
-            "<html><body style='font-family:system-ui;text-align:center;"
-            f"padding:3em'><h2>{safe_body}</h2></body></html>"
+def _parse_callback(target: str, expected_state: str) -> Optional[tuple]:
+    """Interpret the request target of a browser redirect.
+
+    Returns None if the target is not the callback path, otherwise a
+    ``(code, error, message)`` tuple where exactly one of ``code`` and
+    ``error`` is set and ``message`` is the text to show in the browser.
+    """
+    parsed = urllib.parse.urlparse(target)
+    if parsed.path != "/callback":
+        return None
+    params = urllib.parse.parse_qs(parsed.query)
+
+    # Validate state
+    state = params.get("state", [None])[0]
+    if state != expected_state:
+        return None, "State mismatch", "Authorization failed: state mismatch."
+
+    error = params.get("error", [None])[0]
+    if error:
+        desc = params.get("error_description", [error])[0]
+        return None, desc, f"Authorization failed: {desc}"
+
+    code = params.get("code", [None])[0]
+    if not code:
+        return (
+            None,
+            "No authorization code received",
+            "Authorization failed: no code received.",
         )
-        self.wfile.write(page.encode())
 
-    def log_message(self, format, *args):
-        """Suppress default stderr logging."""
-        pass
+    return code, None, "Authorization successful! You can close this tab."
 
 
-def _run_callback_server(port: int, state: str, timeout: float) -> str:
-    """Start a local server, wait for the callback, return the auth code."""
-    _CallbackHandler.auth_code = None
-    _CallbackHandler.auth_error = None
-    _CallbackHandler.expected_state = state
+def _http_response(status: str, message: str = "") -> bytes:
+    """Render a complete HTTP response for the callback connection."""
+    body = b""
+    if message:
+        body = (
+            "<html><body style='font-family:system-ui;text-align:center;"
+            f"padding:3em'><h2>{html.escape(message)}</h2></body></html>"
+        ).encode()
+    head = (
+        f"HTTP/1.1 {status}\r\n"
+        "Content-Type: text/html; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return head.encode("ascii") + body
 
-    server = HTTPServer(("127.0.0.1", port), _CallbackHandler)
-    server.timeout = timeout
 
-    # Handle a single request (the callback)
-    server.handle_request()
-    server.server_close()
+def _read_request_target(conn: socket.socket) -> Optional[str]:
+    """Read one request head from *conn* and return its target, if any."""
+    buf = b""
+    while b"\r\n\r\n" not in buf and len(buf) < CALLBACK_MAX_REQUEST:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        buf += chunk
+    parts = buf.split(b"\r\n", 1)[0].split()
+    if len(parts) < 2 or parts[0] != b"GET":
+        return None
+    return parts[1].decode("latin-1")
 
-    if _CallbackHandler.auth_error:
-        raise OAuthError(_CallbackHandler.auth_error)
-    if not _CallbackHandler.auth_code:
-        raise OAuthError("Timed out waiting for authorization callback")
-    return _CallbackHandler.auth_code
+
+def _run_callback_server(port: int, state: str, timeout: float) -> str:
+    """Listen on *port* for the OAuth redirect and return the auth code.
+
+    Uses a bare socket and a selector rather than an HTTP server: only the
+    request line matters, and stray connections (favicon fetches, browser
+    preconnects) are answered and skipped until the callback arrives.
+    """
+    deadline = time.monotonic() + timeout
+    with socket.socket() as server, selectors.DefaultSelector() as selector:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("127.0.0.1", port))
+        server.listen()
+        server.setblocking(False)
+        selector.register(server, selectors.EVENT_READ)
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not selector.select(remaining):
+                raise OAuthError("Timed out waiting for authorization callback")
+
+            try:
+                conn, _ = server.accept()
+            except BlockingIOError:
+                continue
+            with conn:
+                conn.settimeout(min(remaining, CALLBACK_READ_TIMEOUT))
+                try:
+                    target = _read_request_target(conn)
+                except OSError:
+                    # Idle or broken connection, e.g. a browser preconnect
+                    continue
+                result = _parse_callback(target, state) if target else None
+                if result:
+                    response = _http_response("200 OK", result[2])
+                else:
+                    response = _http_response("404 Not Found")
+                try:
+                    conn.sendall(response)
+                except OSError:
+                    pass
+
+            if result:
+                code, error, _ = result
+                if error:
+                    raise OAuthError(error)
+                return code
 
 
 # ---------------------------------------------------------------------------
@@ -217,7 +287,6 @@ def authorize(server_url: str) -> dict:
         )
 
     # 2. Pick a random port for the callback
-    import socket
     with socket.socket() as s:
         s.bind(("127.0.0.1", 0))
         port = s.getsockname()[1]
@@ -247,27 +316,9 @@ def authorize(server_url: str) -> dict:
     click.echo("Opening browser for authorization...", err=True)
     webbrowser.open(auth_url)
 
-    # 5. Wait for callback in a background thread so we can show a message
-    code_result = [None]
-    error_result = [None]
-
-    def _wait():
-        try:
-            code_result[0] = _run_callback_server(port, state, CALLBACK_TIMEOUT)
-        except OAuthError as e:
-            error_result[0] = e
-
-    t = threading.Thread(target=_wait, daemon=True)
-    t.start()
+    # 5. Wait for the browser to be redirected back to us
     click.echo("Waiting for authorization (press Ctrl+C to cancel)...", err=True)
-    t.join(timeout=CALLBACK_TIMEOUT + 5)
-
-    if error_result[0]:
-        raise error_result[0]
-    if not code_result[0]:
-        raise OAuthError("Timed out waiting for authorization callback")
-
-    auth_code = code_result[0]
+    auth_code = _run_callback_server(port, state, CALLBACK_TIMEOUT)
 
     # 6. Token exchange
     click.echo("Exchanging authorization code for token...", err=True)
@@ -281,7 +332,7 @@ def authorize(server_url: str) -> dict:
     if client_secret:
         token_data["client_secret"] = client_secret
 
-    resp = httpx.post(token_endpoint, data=token_data, timeout=10)
+    resp = _http_client().post(token_endpoint, data=token_data)
     if resp.status_code != 200:
         raise OAuthError(f"Token exchange failed ({resp.status_code}): {resp.text}")
 
@@ -325,7 +376,7 @@ def refresh_token(creds: dict) -> dict:
     if creds.get("client_secret"):
         data["client_secret"] = creds["client_secret"]
 
-    resp = httpx.post(creds["token_endpoint"], data=data, timeout=10)
+    resp = _http_client().post(creds["token_endpoint"], data=data)
     if resp.status_code != 200:
         raise OAuthError(f"Token refresh failed ({resp.status_code}): {resp.text}")
 
@@ -7,12 +7,11 @@ import re
 import subprocess
 import sys
 import urllib.parse
+from functools import lru_cache
 from typing import Dict, Any, Tuple, Optional
 
 # Python 3.10 compatibility: ExceptionGroup was added in 3.11
-try:
-    ExceptionGroup
-except NameError:
+if sys.version_info < (3, 11):
     from exceptiongroup import ExceptionGroup
 
 import click
@@ -60,6 +59,7 @@ def output_error(error_type: str, message: str, exit_code: int,
     sys.exit(exit_code)
 
 
+@lru_cache(maxsize=256)
 def parse_url(full_url: str) -> Tuple[str, str]:
     """Parse the full URL into base URL and virtual path.
 
@@ -83,21 +83,34 @@ def parse_url(full_url: str) -> Tuple[str, str]:
     return base_url, virtual_path
 
 
+# Scalar shapes coerced from -d values, classified in one match. Plain
+# strings fall through without paying for a raised-and-caught ValueError.
+# Numbers take the same forms int() and float() accept: surrounding
+# whitespace and underscores between digits are allowed, and a float
+# needs a decimal point (so "1e5" stays a string).
+_DIGITS = r'\d(?:_?\d)*'
+DATA_VALUE_PATTERN = re.compile(
+    r'(?P<bool>(?ai:true|false))'
+    r'|\s*(?:'
+    rf'(?P<int>[+-]?{_DIGITS})'
+    rf'|(?P<float>[+-]?(?:{_DIGITS}\.(?:{_DIGITS})?|\.{_DIGITS})(?:[eE][+-]?{_DIGITS})?)'
+    r')\s*'
+)
+
+
+@lru_cache(maxsize=256)
 def parse_data_value(value: str) -> Any:
     """Parse a data value and coerce types."""
-    if value.lower() == 'true':
-        return True
-    if value.lower() == 'false':
-        return False
-
-    try:
-        if '.' not in value:
-            return int(value)
-        return float(value)
-    except ValueError:
-        pass
+    match = DATA_VALUE_PATTERN.fullmatch(value)
+    if match is None:
+        return value
 
-    return value
+    kind = match.lastgroup
+    if kind == 'bool':
+        return value.lower() == 'true'
+    if kind == 'int':
+        return int(value)
+    return float(value)
 
 
 def parse_data_flags(data_flags: Tuple[str, ...]) -> Dict[str, Any]:
@@ -110,6 +123,15 @@ def parse_data_flags(data_flags: Tuple[str, ...]) -> Dict[str, Any]:
     """
     result = {}
 
+    # Fast path: plain key=value flags need no JSON detection
+    if not any(data.lstrip()[:1] in ('{', '[') for data in data_flags):
+        for data in data_flags:
+            key, sep, value = data.partition('=')
+            if not sep:
+                raise ValueError(f"Invalid data format: {data}. Expected key=value or JSON")
+            result[key] = parse_data_value(value)
+        return result
+
     for data in data_flags:
         stripped = data.strip()
         if stripped.startswith('{'):
@@ -182,10 +204,10 @@ def parse_headers(header_flags: Tuple[str, ...]) -> Dict[str, str]:
     headers = {}
 
     for header in header_flags:
-        if ':' not in header:
+        key, sep, value = header.partition(':')
+        if not sep:
             raise ValueError(f"Invalid header format: {header}. Expected 'Key: Value'")
 
-        key, value = header.split(':', 1)
         headers[key.strip()] = value.strip()
 
     return headers
@@ -211,13 +233,16 @@ async def make_mcp_request(
             raise ValueError("Missing required 'name' parameter for prompts/get request")
 
     if verbose:
-        click.echo("=== MCP Request ===", err=True)
-        click.echo(f"Method: {method}", err=True)
-        click.echo(f"Params: {json.dumps(params, indent=2)}", err=True)
-        click.echo(f"URL: {base_url}", err=True)
+        lines = [
+            "=== MCP Request ===",
+            f"Method: {method}",
+            f"Params: {json.dumps(params, indent=2)}",
+            f"URL: {base_url}",
+        ]
         if headers:
-            click.echo(f"Headers: {json.dumps(headers, indent=2)}", err=True)
-        click.echo("", err=True)
+            lines.append(f"Headers: {json.dumps(headers, indent=2)}")
+        lines.append("")
+        click.echo("\n".join(lines), err=True)
 
     # Create httpx client with custom headers and reasonable timeout
     import httpx
@@ -232,10 +257,12 @@ async def make_mcp_request(
                 init_result = await session.initialize()
 
                 if verbose:
-                    click.echo("=== MCP Initialization ===", err=True)
-                    click.echo(f"Protocol Version: {init_result.protocolVersion}", err=True)
-                    click.echo(f"Server: {init_result.serverInfo.name} {init_result.serverInfo.version}", err=True)
-                    click.echo("", err=True)
+                    click.echo(
+                        "=== MCP Initialization ===\n"
+                        f"Protocol Version: {init_result.protocolVersion}\n"
+                        f"Server: {init_result.serverInfo.name} {init_result.serverInfo.version}\n",
+                        err=True,
+                    )
 
                 if method == 'tools/list':
                     result = await session.list_tools()
@@ -3,6 +3,7 @@
 import hashlib
 import json
 import os
+import tempfile
 import time
 from pathlib import Path
 from typing import Optional
@@ -20,12 +21,9 @@ def _key_for_url(server_url: str) -> str:
 def get_credentials(server_url: str) -> Optional[dict]:
     """Load stored credentials for a server URL, or None if not found."""
     path = CREDENTIALS_DIR / f"{_key_for_url(server_url)}.json"
-    if not path.exists():
-        return None
     try:
-        with open(path) as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
+        return json.loads(path.read_bytes())
+    except (json.JSONDecodeError, UnicodeDecodeError, OSError):
         return None
 
 
@@ -39,12 +37,22 @@ def save_credentials(server_url: str, creds: dict) -> None:
     path = CREDENTIALS_DIR / f"{_key_for_url(server_url)}.json"
     data_to_save = dict(creds)
     data_to_save["server_url"] = server_url
-    with open(path, "w") as f:
-        json.dump(data_to_save, f, indent=2)
+
+    # Write to a private temp file and rename it into place, so readers
+    # never observe a half-written file and the token is never world-readable.
+    # mkstemp gives each writer its own 0600 file, so concurrent saves for
+    # the same server cannot clobber each other's temp file.
+    fd, tmp = tempfile.mkstemp(dir=CREDENTIALS_DIR, prefix=path.name + ".", suffix=".tmp")
     try:
-        os.chmod(path, 0o600)
-    except OSError:
-        pass  # Best-effort permissions
+        with os.fdopen(fd, "w") as f:
+            json.dump(data_to_save, f, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
 
 
 def clear_credentials(server_url: str) -> None:
@@ -0,0 +1,221 @@
+"""Shared pytest fixtures."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from .mcp_test_server import BoundedThreadingHTTPServer, MCPJSONRPCHandler
+
+
+# Fixtures that start an MCP server; tests using them are integration tests
+SERVER_FIXTURES = {"mcp_server", "mcp_proxy_server"}
+
+
+def pytest_collection_modifyitems(items):
+    """Mark every test that depends on a test server as ``integration``.
+
+    Tagging by fixture rather than by hand keeps the marker honest: a test
+    that starts using a server is deselected along with the rest, so
+    ``-m 'not integration'`` never pays for server start-up.
+    """
+    for item in items:
+        if SERVER_FIXTURES.intersection(getattr(item, "fixturenames", ())):
+            item.add_marker(pytest.mark.integration)
+
+
+@pytest.fixture(scope="session")
+def mcp_server():
+    """Serve the MCP test server from a background thread for integration tests.
+
+    Runs in-process, so there is no interpreter start-up or readiness
+    handshake: the socket is listening once the server is constructed. It
+    binds an ephemeral port, so concurrent test runs (or xdist workers)
+    never collide; the URL to use is the fixture value.
+    """
+    server = BoundedThreadingHTTPServer(('localhost', 0), MCPJSONRPCHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://localhost:{server.server_address[1]}"
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+# Seconds to wait for the simulated mcp-proxy to report it is listening
+PROXY_START_TIMEOUT = 5.0
+
+# Script the simulated mcp-proxy runs; resolved once at import
+SERVER_SCRIPT = Path(__file__).parent / "mcp_test_server.py"
+
+
+def _wait_for_ready(stream, timeout):
+    """Return the port from the first "READY <port>" line on *stream*.
+
+    The pipe is read on a helper thread so the wait can time out on every
+    platform (select() does not work on pipes on Windows). Returns None if
+    the stream ends first; raises TimeoutError if *timeout* runs out.
+    """
+    ports = []
+
+    def read():
+        for line in stream:
+            if line.startswith("READY"):
+                ports.append(int(line.split()[1]))
+                return
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    reader.join(timeout)
+    if reader.is_alive():
+        raise TimeoutError
+    return ports[0] if ports else None
+
+
+@pytest.fixture(scope="session")
+def mcp_proxy_server(tmp_path_factory):
+    """Start a simulated mcp-proxy server for integration tests.
+
+    This simulates what mcp-proxy does: it takes a stdio MCP server
+    and exposes it via HTTP. For testing purposes, we use the same
+    test server in its own process on its own ephemeral port to verify
+    the pattern works.
+    """
+    # stderr goes to a file so a chatty server can never block on a full pipe;
+    # stdout only carries the READY line and a banner
+    log_path = tmp_path_factory.mktemp("mcp-proxy") / "server.log"
+    log = open(log_path, "w")
+
+    # Start server process (simulating mcp-proxy's HTTP output)
+    # In real usage, this would be: mcp-proxy --sse-port 8766 stdio-mcp-server
+    # -S skips site-packages: the server needs only the stdlib, and
+    # dropping site.py shaves a noticeable slice off interpreter start-up
+    process = subprocess.Popen(
+        [sys.executable, "-S", str(SERVER_SCRIPT)],
+        env={**os.environ, 'TEST_PORT': '0', 'PYTHONDONTWRITEBYTECODE': '1'},
+        stdout=subprocess.PIPE,
+        stderr=log,
+        text=True
+    )
+    log.close()
+
+    # The server prints "READY <port>" once its socket is listening
+    try:
+        port = _wait_for_ready(process.stdout, PROXY_START_TIMEOUT)
+    except TimeoutError:
+        process.kill()
+        process.wait()
+        pytest.fail(
+            f"Proxy server not ready after {PROXY_START_TIMEOUT}s:\n"
+            f"{log_path.read_text()}"
+        )
+    if port is None:
+        process.wait()
+        pytest.fail(f"Proxy server failed to start:\n{log_path.read_text()}")
+
+    yield f"http://localhost:{port}"
+
+    # Cleanup: the server keeps no state worth a graceful shutdown
+    process.kill()
+    process.wait(timeout=1.0)
+    process.stdout.close()
+
+
+class StrictCliRunner(CliRunner):
+    """CliRunner that lets unexpected exceptions escape by default.
+
+    SystemExit is still turned into ``result.exit_code``; anything else
+    fails the test with its real traceback. Pass ``catch_exceptions=True``
+    to inspect ``result.exception`` instead.
+    """
+
+    def invoke(self, *args, catch_exceptions=False, **kwargs):
+        return super().invoke(*args, catch_exceptions=catch_exceptions, **kwargs)
+
+
+@pytest.fixture(scope="session")
+def runner():
+    """Click test runner shared by every CLI invocation in the session."""
+    return StrictCliRunner()
+
+
+# (connect, read) timeouts in seconds for a reachability probe
+PROBE_TIMEOUT = (2, 2)
+
+# Keep-alive session shared by reachability probes, created on first use
+_session = None
+
+
+def _probe_session():
+    """Return the shared probe session, importing requests only when needed.
+
+    Unit-only runs never probe, so they skip the requests/urllib3 import.
+    """
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
+
+
+@lru_cache(maxsize=None)
+def is_server_reachable(url: str) -> bool:
+    """Check if the server is reachable.
+
+    Each URL is probed at most once per session; later checks reuse the answer.
+
+    Args:
+        url: The server URL to check
+
+    Returns:
+        True if the server responds, False otherwise
+    """
+    # HEAD with short connect/read timeouts: any non-5xx answer (405 included)
+    # proves the host is up, and a hung host costs at most a couple of seconds
+    import requests
+
+    try:
+        response = _probe_session().head(url, timeout=PROBE_TIMEOUT, allow_redirects=False)
+        return response.status_code < 500
+    except (requests.ConnectionError, requests.Timeout):
+        return False
+
+
+# Reachability results are kept in the pytest cache for this many seconds,
+# so quick re-runs skip probing hosts that were just checked
+REACHABILITY_TTL = 60
+REACHABILITY_CACHE_KEY = "murl/reachable"
+
+
+@pytest.fixture(scope="session")
+def require_reachable(request):
+    """Return a function that skips the calling test if a server is unreachable.
+
+    Probing happens when a test runs rather than at import, so deselected
+    tests never touch the network. Without the cacheprovider plugin
+    (``-p no:cacheprovider``) every check probes directly.
+    """
+    cache = getattr(request.config, "cache", None)
+
+    def check(url: str, name: str) -> None:
+        if cache is None:
+            ok = is_server_reachable(url)
+        else:
+            entries = cache.get(REACHABILITY_CACHE_KEY, {})
+            checked_at, ok = entries.get(url, (0, False))
+            if time.time() - checked_at > REACHABILITY_TTL:
+                ok = is_server_reachable(url)
+                entries[url] = (time.time(), ok)
+                cache.set(REACHABILITY_CACHE_KEY, entries)
+        if not ok:
+            pytest.skip(f"{name} server is not reachable")
+
+    return check
@@ -1,245 +1,336 @@
 """Real MCP-compatible HTTP JSON-RPC test server for integration testing."""
 
 import json
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Any, Dict, List
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Dict, List, Optional
+
+# orjson is optional: fall back to the stdlib so the server runs anywhere
+try:
+    import orjson
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    loads = json.loads
+
+
+# Results that never change between requests
+_INITIALIZE_RESULT = {
+    "protocolVersion": "2024-11-05",
+    "capabilities": {
+        "tools": {},
+        "resources": {},
+        "prompts": {}
+    },
+    "serverInfo": {
+        "name": "mcp-test-server",
+        "version": "0.1.0"
+    }
+}
+
+_TOOLS_LIST_RESULT = {
+    "tools": [
+        {
+            "name": "echo",
+            "description": "Echo back the input message",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "message": {
+                        "type": "string",
+                        "description": "Message to echo back"
+                    }
+                },
+                "required": ["message"]
+            }
+        },
+        {
+            "name": "weather",
+            "description": "Get weather information for a city",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "city": {
+                        "type": "string",
+                        "description": "City name"
+                    },
+                    "metric": {
+                        "type": "boolean",
+                        "description": "Use metric units"
+                    }
+                },
+                "required": ["city"]
+            }
+        },
+    ]
+}
+
+_RESOURCES_LIST_RESULT = {
+    "resources": [
+        {
+            "uri": "file:///path/to/file1.txt",
+            "name": "file1.txt",
+            "mimeType": "text/plain"
+        },
+        {
+            "uri": "file:///path/to/file2.txt",
+            "name": "file2.txt",
+            "mimeType": "text/plain"
+        },
+    ]
+}
+
+_PROMPTS_LIST_RESULT = {
+    "prompts": [
+        {
+            "name": "greeting",
+            "description": "Generate a greeting"
+        },
+        {
+            "name": "summary",
+            "description": "Generate a summary"
+        },
+    ]
+}
+
+# Pre-serialized once so the list/initialize methods skip the encoder
+_STATIC_RESULT_BYTES = {
+    'initialize': dumps(_INITIALIZE_RESULT),
+    'tools/list': dumps(_TOOLS_LIST_RESULT),
+    'resources/list': dumps(_RESOURCES_LIST_RESULT),
+    'prompts/list': dumps(_PROMPTS_LIST_RESULT),
+}
+
+
+def handle_tools_call(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Handle tools/call request."""
+    name = params.get('name')
+    arguments = params.get('arguments', {})
+    
+    if name == "echo":
+        return {
+            "content": [
+                {
+                    "type": "text",
+                    "text": arguments.get("message", "")
+                }
+            ]
+        }
+    elif name == "weather":
+        return {
+            "content": [
+                {
+                    "type": "text",
+                    "text": f"Weather in {arguments.get('city', 'Unknown')}: 72°F"
+                }
+            ]
+        }
+    else:
+        raise ValueError(f"Unknown tool: {name}")
+
+
+def handle_resources_read(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Handle resources/read request."""
+    uri = params.get('uri', '')
+    return {
+        "contents": [
+            {
+                "uri": uri,
+                "mimeType": "text/plain",
+                "text": "Mock file content"
+            }
+        ]
+    }
+
+
+def handle_prompts_get(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Handle prompts/get request."""
+    name = params.get('name', '')
+    arguments = params.get('arguments', {})
+    user_name = arguments.get('name', 'World')
+    
+    return {
+        "messages": [
+            {
+                "role": "user",
+                "content": {
+                    "type": "text",
+                    "text": f"Hello {user_name}!"
+                }
+            }
+        ]
+    }
+
+
+# Method name -> handler for methods whose result depends on params
+_DISPATCH = {
+    'tools/call': handle_tools_call,
+    'resources/read': handle_resources_read,
+    'prompts/get': handle_prompts_get,
+}
 
 
 class MCPJSONRPCHandler(BaseHTTPRequestHandler):
     """Handler for MCP JSON-RPC requests over HTTP POST."""
     
+    # Keep connections open so a client can reuse one socket for many calls
+    protocol_version = 'HTTP/1.1'
+    
+    # Notification acknowledgement never varies, so send it pre-rendered
+    _ACCEPTED_RESPONSE = b'HTTP/1.1 202 Accepted\r\nContent-Length: 0\r\n\r\n'
+    
+    # Response shapes are fixed; only the id and payload vary
+    _OK_ENVELOPE = b'{"jsonrpc":"2.0","id":%s,"result":%s}'
+    _ERROR_ENVELOPE = b'{"jsonrpc":"2.0","id":%s,"error":{"code":%d,"message":%s}}'
+    
+    # Upper bound on requests accepted in one JSON-RPC batch
+    MAX_BATCH_SIZE = 64
+    
+    # Largest request body accepted, in bytes
+    MAX_BODY_SIZE = 8 * 1024 * 1024
+    
     def do_POST(self):
         """Handle POST requests with JSON-RPC payloads."""
         try:
             content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            request = json.loads(post_data.decode('utf-8'))
-            
-            # Validate JSON-RPC request
-            if request.get('jsonrpc') != '2.0':
-                self.send_error_response(request.get('id'), -32600, "Invalid Request")
+            if content_length > self.MAX_BODY_SIZE:
+                self.send_error(413, "Request body too large")
                 return
-            
-            method = request.get('method')
-            params = request.get('params', {})
-            request_id = request.get('id')
-            
-            # Handle notifications (no response expected)
-            if request_id is None:
-                if method == 'notifications/initialized':
-                    # Just acknowledge the notification
-                    self.send_response(202)
-                    self.end_headers()
-                    return
-                else:
-                    # Unknown notification - just acknowledge
-                    self.send_response(202)
-                    self.end_headers()
-                    return
-            
-            # Route to appropriate handler
-            if method == 'initialize':
-                result = self.handle_initialize(params)
-            elif method == 'tools/list':
-                result = self.handle_tools_list()
-            elif method == 'tools/call':
-                result = self.handle_tools_call(params)
-            elif method == 'resources/list':
-                result = self.handle_resources_list()
-            elif method == 'resources/read':
-                result = self.handle_resources_read(params)
-            elif method == 'prompts/list':
-                result = self.handle_prompts_list()
-            elif method == 'prompts/get':
-                result = self.handle_prompts_get(params)
-            else:
-                self.send_error_response(request_id, -32601, f"Method not found: {method}")
-                return
-            
-            # Send successful response
-            response = {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": result
-            }
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode('utf-8'))
-            
+            request = loads(self.read_body(content_length))
         except json.JSONDecodeError:
             self.send_error_response(None, -32700, "Parse error")
+            return
         except Exception as e:
             self.send_error_response(None, -32603, f"Internal error: {str(e)}")
-    
-    def send_error_response(self, request_id: Any, code: int, message: str):
-        """Send a JSON-RPC error response."""
-        response = {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "error": {
-                "code": code,
-                "message": message
-            }
-        }
+            return
         
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps(response).encode('utf-8'))
+        # Batch: process every entry and answer with a single JSON array
+        if isinstance(request, list):
+            if not request or len(request) > self.MAX_BATCH_SIZE:
+                self.send_error_response(None, -32600, "Invalid Request")
+                return
+            bodies = [body for body in map(self.handle_message, request) if body is not None]
+            if bodies:
+                self.send_json_body(b'[' + b','.join(bodies) + b']')
+            else:
+                self.send_accepted()
+            return
+        
+        body = self.handle_message(request)
+        if body is None:
+            self.send_accepted()
+        else:
+            self.send_json_body(body)
     
-    def handle_initialize(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle initialize request per MCP spec."""
-        return {
-            "protocolVersion": "2024-11-05",
-            "capabilities": {
-                "tools": {},
-                "resources": {},
-                "prompts": {}
-            },
-            "serverInfo": {
-                "name": "mcp-test-server",
-                "version": "0.1.0"
-            }
-        }
+    def read_body(self, content_length: int) -> bytearray:
+        """Read the request body straight into one preallocated buffer."""
+        body = bytearray(content_length)
+        view = memoryview(body)
+        received = 0
+        while received < content_length:
+            n = self.rfile.readinto(view[received:])
+            if not n:
+                break
+            received += n
+        view.release()
+        # Client hung up early: hand back what arrived (it will fail to parse)
+        del body[received:]
+        return body
     
-    def handle_tools_list(self) -> Dict[str, Any]:
-        """Handle tools/list request."""
-        return {
-            "tools": [
-                {
-                    "name": "echo",
-                    "description": "Echo back the input message",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "message": {
-                                "type": "string",
-                                "description": "Message to echo back"
-                            }
-                        },
-                        "required": ["message"]
-                    }
-                },
-                {
-                    "name": "weather",
-                    "description": "Get weather information for a city",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "city": {
-                                "type": "string",
-                                "description": "City name"
-                            },
-                            "metric": {
-                                "type": "boolean",
-                                "description": "Use metric units"
-                            }
-                        },
-                        "required": ["city"]
-                    }
-                },
-            ]
-        }
-    
-    def handle_tools_call(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle tools/call request."""
-        name = params.get('name')
-        arguments = params.get('arguments', {})
+    def handle_message(self, request: Any) -> Optional[bytes]:
+        """Handle one JSON-RPC request.
         
-        if name == "echo":
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": arguments.get("message", "")
-                    }
-                ]
-            }
-        elif name == "weather":
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"Weather in {arguments.get('city', 'Unknown')}: 72°F"
-                    }
-                ]
-            }
-        else:
-            raise ValueError(f"Unknown tool: {name}")
+        Returns the serialized response, or None for notifications.
+        """
+        # Validate JSON-RPC request
+        if not isinstance(request, dict) or request.get('jsonrpc') != '2.0':
+            request_id = request.get('id') if isinstance(request, dict) else None
+            return self.error_body(request_id, -32600, "Invalid Request")
+        
+        # Notifications (no response expected) are just acknowledged
+        request_id = request.get('id')
+        if request_id is None:
+            return None
+        
+        # Static results: splice the request id into the cached bytes
+        method = request.get('method')
+        static_result = _STATIC_RESULT_BYTES.get(method)
+        if static_result is not None:
+            return self._OK_ENVELOPE % (dumps(request_id), static_result)
+        
+        # Route to appropriate handler
+        handler = _DISPATCH.get(method)
+        if handler is None:
+            return self.error_body(request_id, -32601, f"Method not found: {method}")
+        try:
+            result = handler(request.get('params', {}))
+        except Exception as e:
+            return self.error_body(request_id, -32603, f"Internal error: {str(e)}")
+        return self._OK_ENVELOPE % (dumps(request_id), dumps(result))
     
-    def handle_resources_list(self) -> Dict[str, Any]:
-        """Handle resources/list request."""
-        return {
-            "resources": [
-                {
-                    "uri": "file:///path/to/file1.txt",
-                    "name": "file1.txt",
-                    "mimeType": "text/plain"
-                },
-                {
-                    "uri": "file:///path/to/file2.txt",
-                    "name": "file2.txt",
-                    "mimeType": "text/plain"
-                },
-            ]
-        }
+    def error_body(self, request_id: Any, code: int, message: str) -> bytes:
+        """Serialize a JSON-RPC error response."""
+        return self._ERROR_ENVELOPE % (dumps(request_id), code, dumps(message))
     
-    def handle_resources_read(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle resources/read request."""
-        uri = params.get('uri', '')
-        return {
-            "contents": [
-                {
-                    "uri": uri,
-                    "mimeType": "text/plain",
-                    "text": "Mock file content"
-                }
-            ]
-        }
+    def send_error_response(self, request_id: Any, code: int, message: str):
+        """Send a JSON-RPC error response."""
+        self.send_json_body(self.error_body(request_id, code, message))
     
-    def handle_prompts_list(self) -> Dict[str, Any]:
-        """Handle prompts/list request."""
-        return {
-            "prompts": [
-                {
-                    "name": "greeting",
-                    "description": "Generate a greeting"
-                },
-                {
-                    "name": "summary",
-                    "description": "Generate a summary"
-                },
-            ]
-        }
+    def send_json_body(self, body: bytes):
+        """Send an already-serialized JSON-RPC response body."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
     
-    def handle_prompts_get(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle prompts/get request."""
-        name = params.get('name', '')
-        arguments = params.get('arguments', {})
-        user_name = arguments.get('name', 'World')
-        
-        return {
-            "messages": [
-                {
-                    "role": "user",
-                    "content": {
-                        "type": "text",
-                        "text": f"Hello {user_name}!"
-                    }
-                }
-            ]
-        }
+    def send_accepted(self):
+        """Acknowledge a notification with an empty 202 response."""
+        self.wfile.write(self._ACCEPTED_RESPONSE)
     
     def log_message(self, format, *args):
         """Suppress default logging."""
         pass
 
 
+class BoundedThreadingHTTPServer(ThreadingHTTPServer):
+    """Thread-per-connection server that caps concurrent connections."""
+
+    daemon_threads = True
+    max_connections = 32
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+
+    def process_request(self, request, client_address):
+        # Block the accept loop until a worker slot frees up
+        self._slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+
 def run_server(port: int = 8765):
-    """Run the MCP test server."""
-    server = HTTPServer(('localhost', port), MCPJSONRPCHandler)
+    """Run the MCP test server.
+    
+    Port 0 binds an ephemeral port; the port actually bound is reported
+    in the READY line.
+    """
+    server = BoundedThreadingHTTPServer(('localhost', port), MCPJSONRPCHandler)
+    port = server.server_address[1]
+    # Readiness handshake for test fixtures: the socket is already listening
+    print(f"READY {port}", flush=True)
     print(f"MCP JSON-RPC test server running on http://localhost:{port}")
     try:
         server.serve_forever()
@@ -1,15 +1,22 @@
 """Tests for the OAuth 2.0 auth module."""
 
+import socket
+import stat
+import threading
 import time
 import urllib.parse
-from unittest.mock import patch, MagicMock
+from unittest.mock import Mock
 
 import pytest
 import httpx
 
 from murl.auth import (
     _auth_base_url,
+    _clear_metadata_cache,
     _generate_pkce,
+    _http_client,
+    _parse_callback,
+    _run_callback_server,
     discover_metadata,
     register_client,
     authorize,
@@ -42,6 +49,39 @@ class TestTokenStore:
         assert loaded["access_token"] == "tok123"
         assert loaded["server_url"] == url
 
+    def test_save_is_atomic_and_private(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("murl.token_store.CREDENTIALS_DIR", tmp_path)
+        url = "https://example.com/mcp"
+        save_credentials(url, {"access_token": "old"})
+        save_credentials(url, {"access_token": "new"})
+
+        files = list(tmp_path.iterdir())
+        assert len(files) == 1  # no leftover temp file
+        assert stat.S_IMODE(files[0].stat().st_mode) == 0o600
+        assert get_credentials(url)["access_token"] == "new"
+
+    def test_concurrent_saves(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("murl.token_store.CREDENTIALS_DIR", tmp_path)
+        url = "https://example.com/mcp"
+        errors = []
+
+        def save_many(writer):
+            try:
+                for i in range(200):
+                    save_credentials(url, {"access_token": f"tok-{writer}-{i}"})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=save_many, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert len(list(tmp_path.iterdir())) == 1  # no leftover temp files
+        assert get_credentials(url)["access_token"].startswith("tok-")
+
     def test_clear(self, tmp_path, monkeypatch):
         monkeypatch.setattr("murl.token_store.CREDENTIALS_DIR", tmp_path)
         url = "https://example.com/mcp"
@@ -77,6 +117,9 @@ class TestAuthHelpers:
         assert _auth_base_url("https://foo.com/mcp/default") == "https://foo.com"
         assert _auth_base_url("http://localhost:3000/mcp") == "http://localhost:3000"
 
+    def test_http_client_is_shared(self):
+        assert _http_client() is _http_client()
+
     def test_pkce_verifier_and_challenge_differ(self):
         v, c = _generate_pkce()
         assert v != c
@@ -88,54 +131,160 @@ class TestAuthHelpers:
         assert "/" not in c
 
 
+# ---------------------------------------------------------------------------
+# Local callback server
+# ---------------------------------------------------------------------------
+
+class TestCallbackServer:
+
+    def test_parse_success(self):
+        code, error, _ = _parse_callback("/callback?code=abc&state=s1", "s1")
+        assert code == "abc"
+        assert error is None
+
+    def test_parse_state_mismatch(self):
+        code, error, _ = _parse_callback("/callback?code=abc&state=bad", "s1")
+        assert code is None
+        assert error == "State mismatch"
+
+    def test_parse_provider_error(self):
+        target = "/callback?state=s1&error=access_denied&error_description=Nope"
+        assert _parse_callback(target, "s1")[1] == "Nope"
+
+    def test_parse_other_path(self):
+        assert _parse_callback("/favicon.ico", "s1") is None
+
+    def test_skips_stray_request_then_returns_code(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        result = {}
+        server = threading.Thread(
+            target=lambda: result.update(code=_run_callback_server(port, "s1", 5)),
+        )
+        server.start()
+
+        def get(path):
+            deadline = time.monotonic() + 5
+            while True:
+                try:
+                    conn = socket.create_connection(("127.0.0.1", port), timeout=5)
+                    break
+                except ConnectionRefusedError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.01)
+            with conn:
+                conn.sendall(f"GET {path} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+                return conn.recv(4096).split(b"\r\n", 1)[0]
+
+        assert get("/favicon.ico") == b"HTTP/1.1 404 Not Found"
+        assert get("/callback?code=abc&state=s1") == b"HTTP/1.1 200 OK"
+        server.join(timeout=5)
+        assert result["code"] == "abc"
+
+    def test_timeout(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        with pytest.raises(OAuthError, match="Timed out"):
+            _run_callback_server(port, "s1", 0.05)
+
+
+@pytest.fixture(autouse=True)
+def fresh_metadata_cache():
+    """Keep discovered metadata from leaking between tests."""
+    _clear_metadata_cache()
+    yield
+    _clear_metadata_cache()
+
+
+@pytest.fixture
+def http_client(monkeypatch):
+    """Replace the shared OAuth HTTP client with a mock."""
+    client = Mock()
+    monkeypatch.setattr("murl.auth._http_client", lambda: client)
+    return client
+
+
+@pytest.fixture(scope="module")
+def make_resp():
+    """Factory for lightweight fake httpx responses."""
+    def _make(status_code, payload=None, text=""):
+        resp = Mock()
+        resp.status_code = status_code
+        resp.json.return_value = payload
+        resp.text = text
+        return resp
+    return _make
+
+
 # ---------------------------------------------------------------------------
 # discover_metadata
 # ---------------------------------------------------------------------------
 
 class TestDiscoverMetadata:
 
-    def test_success(self):
+    def test_success(self, make_resp, http_client):
         meta = {
             "authorization_endpoint": "https://auth.example.com/authorize",
             "token_endpoint": "https://auth.example.com/token",
             "registration_endpoint": "https://auth.example.com/register",
         }
+        http_client.get.return_value = make_resp(200, meta)
+
+        result = discover_metadata("https://example.com/mcp")
+        assert result == meta
+        http_client.get.assert_called_once()
+
+    def test_fallback_on_404(self, make_resp, http_client):
+        http_client.get.return_value = make_resp(404)
+
+        result = discover_metadata("https://example.com/mcp")
+        assert "/authorize" in result["authorization_endpoint"]
+        assert "/token" in result["token_endpoint"]
+        assert "/register" in result["registration_endpoint"]
 
-        with patch("murl.auth.httpx.get") as mock_get:
-            mock_resp = MagicMock()
-            mock_resp.status_code = 200
-            mock_resp.json.return_value = meta
-            mock_get.return_value = mock_resp
+    def test_fallback_on_network_error(self, http_client):
+        http_client.get.side_effect = httpx.ConnectError("fail")
 
-            result = discover_metadata("https://example.com/mcp")
-            assert result == meta
-            mock_get.assert_called_once()
+        result = discover_metadata("https://example.com/mcp")
+        assert "authorization_endpoint" in result
 
-    def test_fallback_on_404(self):
-        with patch("murl.auth.httpx.get") as mock_get:
-            mock_resp = MagicMock()
-            mock_resp.status_code = 404
-            mock_get.return_value = mock_resp
+    def test_error_on_500(self, make_resp, http_client):
+        http_client.get.return_value = make_resp(500, text="Internal Server Error")
 
-            result = discover_metadata("https://example.com/mcp")
-            assert "/authorize" in result["authorization_endpoint"]
-            assert "/token" in result["token_endpoint"]
-            assert "/register" in result["registration_endpoint"]
+        with pytest.raises(OAuthError, match="Failed to fetch OAuth metadata"):
+            discover_metadata("https://example.com/mcp")
 
-    def test_fallback_on_network_error(self):
-        with patch("murl.auth.httpx.get", side_effect=httpx.ConnectError("fail")):
-            result = discover_metadata("https://example.com/mcp")
-            assert "authorization_endpoint" in result
+    def test_cached_per_server(self, make_resp, http_client):
+        http_client.get.return_value = make_resp(200, {"token_endpoint": "t"})
 
-    def test_error_on_500(self):
-        with patch("murl.auth.httpx.get") as mock_get:
-            mock_resp = MagicMock()
-            mock_resp.status_code = 500
-            mock_resp.text = "Internal Server Error"
-            mock_get.return_value = mock_resp
+        discover_metadata("https://example.com/mcp")
+        result = discover_metadata("https://example.com/other")
+        assert result == {"token_endpoint": "t"}
+        http_client.get.assert_called_once()
 
-            with pytest.raises(OAuthError, match="Failed to fetch OAuth metadata"):
-                discover_metadata("https://example.com/mcp")
+        discover_metadata("https://other.example.com/mcp")
+        assert http_client.get.call_count == 2
+
+    def test_cache_expires(self, make_resp, http_client, monkeypatch):
+        http_client.get.return_value = make_resp(200, {"token_endpoint": "t"})
+        discover_metadata("https://example.com/mcp")
+
+        later = time.monotonic() + 301
+        monkeypatch.setattr("murl.auth.time.monotonic", lambda: later)
+        discover_metadata("https://example.com/mcp")
+        assert http_client.get.call_count == 2
+
+    def test_network_error_not_cached(self, make_resp, http_client):
+        http_client.get.side_effect = [
+            httpx.ConnectError("fail"),
+            make_resp(200, {"token_endpoint": "t"}),
+        ]
+
+        discover_metadata("https://example.com/mcp")
+        assert discover_metadata("https://example.com/mcp") == {"token_endpoint": "t"}
 
 
 # ---------------------------------------------------------------------------
@@ -144,34 +293,23 @@ class TestDiscoverMetadata:
 
 class TestRegisterClient:
 
-    def test_success(self):
-        with patch("murl.auth.httpx.post") as mock_post:
-            mock_resp = MagicMock()
-            mock_resp.status_code = 201
-            mock_resp.json.return_value = {
-                "client_id": "cid_123",
-                "client_secret": "csec_456",
-            }
-            mock_post.return_value = mock_resp
-
-            result = register_client(
+    def test_success(self, make_resp, http_client):
+        http_client.post.return_value = make_resp(201, {"client_id": "cid_123", "client_secret": "csec_456"})
+
+        result = register_client(
+            "https://auth.example.com/register",
+            "http://127.0.0.1:9999/callback",
+        )
+        assert result["client_id"] == "cid_123"
+
+    def test_failure(self, make_resp, http_client):
+        http_client.post.return_value = make_resp(400, text="bad request")
+
+        with pytest.raises(OAuthError, match="registration failed"):
+            register_client(
                 "https://auth.example.com/register",
                 "http://127.0.0.1:9999/callback",
             )
-            assert result["client_id"] == "cid_123"
-
-    def test_failure(self):
-        with patch("murl.auth.httpx.post") as mock_post:
-            mock_resp = MagicMock()
-            mock_resp.status_code = 400
-            mock_resp.text = "bad request"
-            mock_post.return_value = mock_resp
-
-            with pytest.raises(OAuthError, match="registration failed"):
-                register_client(
-                    "https://auth.example.com/register",
-                    "http://127.0.0.1:9999/callback",
-                )
 
 
 # ---------------------------------------------------------------------------
@@ -180,49 +318,39 @@ class TestRegisterClient:
 
 class TestRefreshToken:
 
-    def test_success(self):
+    def test_success(self, make_resp, http_client):
         creds = {
             "client_id": "cid",
             "client_secret": None,
             "refresh_token": "rt_old",
             "token_endpoint": "https://auth.example.com/token",
         }
+        http_client.post.return_value = make_resp(200, {
+            "access_token": "new_at",
+            "refresh_token": "new_rt",
+            "expires_in": 7200,
+        })
 
-        with patch("murl.auth.httpx.post") as mock_post:
-            mock_resp = MagicMock()
-            mock_resp.status_code = 200
-            mock_resp.json.return_value = {
-                "access_token": "new_at",
-                "refresh_token": "new_rt",
-                "expires_in": 7200,
-            }
-            mock_post.return_value = mock_resp
-
-            updated = refresh_token(creds)
-            assert updated["access_token"] == "new_at"
-            assert updated["refresh_token"] == "new_rt"
-            assert updated["expires_at"] > time.time()
+        updated = refresh_token(creds)
+        assert updated["access_token"] == "new_at"
+        assert updated["refresh_token"] == "new_rt"
+        assert updated["expires_at"] > time.time()
 
     def test_no_refresh_token(self):
         with pytest.raises(OAuthError, match="No refresh token"):
             refresh_token({"client_id": "cid", "token_endpoint": "https://x"})
 
-    def test_failure(self):
+    def test_failure(self, make_resp, http_client):
         creds = {
             "client_id": "cid",
             "client_secret": None,
             "refresh_token": "rt",
             "token_endpoint": "https://auth.example.com/token",
         }
+        http_client.post.return_value = make_resp(400, text="invalid_grant")
 
-        with patch("murl.auth.httpx.post") as mock_post:
-            mock_resp = MagicMock()
-            mock_resp.status_code = 400
-            mock_resp.text = "invalid_grant"
-            mock_post.return_value = mock_resp
-
-            with pytest.raises(OAuthError, match="refresh failed"):
-                refresh_token(creds)
+        with pytest.raises(OAuthError, match="refresh failed"):
+            refresh_token(creds)
 
 
 # ---------------------------------------------------------------------------
@@ -231,44 +359,38 @@ class TestRefreshToken:
 
 class TestAuthorize:
 
-    def _mock_full_flow(self, mock_httpx_get, mock_httpx_post, mock_webbrowser, mock_server):
-        """Set up mocks for a successful full OAuth flow."""
+    def _mock_full_flow(self, make_resp, http_client, monkeypatch):
+        """Set up mocks for a successful full OAuth flow.
+
+        Returns the mocked ``webbrowser.open``.
+        """
         # Metadata discovery
-        meta_resp = MagicMock()
-        meta_resp.status_code = 200
-        meta_resp.json.return_value = {
+        meta_resp = make_resp(200, {
             "authorization_endpoint": "https://auth.example.com/authorize",
             "token_endpoint": "https://auth.example.com/token",
             "registration_endpoint": "https://auth.example.com/register",
-        }
-        mock_httpx_get.return_value = meta_resp
+        })
+        http_client.get.return_value = meta_resp
 
         # Registration + token exchange (two POST calls)
-        reg_resp = MagicMock()
-        reg_resp.status_code = 201
-        reg_resp.json.return_value = {"client_id": "cid_test"}
-
-        token_resp = MagicMock()
-        token_resp.status_code = 200
-        token_resp.json.return_value = {
+        reg_resp = make_resp(201, {"client_id": "cid_test"})
+        token_resp = make_resp(200, {
             "access_token": "at_final",
             "refresh_token": "rt_final",
             "expires_in": 3600,
-        }
-        mock_httpx_post.side_effect = [reg_resp, token_resp]
-
-        # Browser open — no-op
-        mock_webbrowser.return_value = True
+        })
+        http_client.post.side_effect = [reg_resp, token_resp]
 
         # Callback server returns a code
-        mock_server.return_value = "test_auth_code"
+        monkeypatch.setattr("murl.auth._run_callback_server", Mock(return_value="test_auth_code"))
+
+        # Browser open — no-op
+        mock_browser = Mock(return_value=True)
+        monkeypatch.setattr("murl.auth.webbrowser.open", mock_browser)
+        return mock_browser
 
-    @patch("murl.auth._run_callback_server")
-    @patch("murl.auth.webbrowser.open")
-    @patch("murl.auth.httpx.post")
-    @patch("murl.auth.httpx.get")
-    def test_full_flow(self, mock_get, mock_post, mock_browser, mock_server):
-        self._mock_full_flow(mock_get, mock_post, mock_browser, mock_server)
+    def test_full_flow(self, make_resp, http_client, monkeypatch):
+        mock_browser = self._mock_full_flow(make_resp, http_client, monkeypatch)
 
         creds = authorize("https://example.com/mcp")
 
@@ -289,19 +411,13 @@ class TestAuthorize:
         assert "state" in params
         assert "code_challenge" in params
 
-    @patch("murl.auth._run_callback_server")
-    @patch("murl.auth.webbrowser.open")
-    @patch("murl.auth.httpx.post")
-    @patch("murl.auth.httpx.get")
-    def test_no_registration_endpoint(self, mock_get, mock_post, mock_browser, mock_server):
-        meta_resp = MagicMock()
-        meta_resp.status_code = 200
-        meta_resp.json.return_value = {
+    def test_no_registration_endpoint(self, make_resp, http_client):
+        meta_resp = make_resp(200, {
             "authorization_endpoint": "https://auth.example.com/authorize",
             "token_endpoint": "https://auth.example.com/token",
             # No registration_endpoint
-        }
-        mock_get.return_value = meta_resp
+        })
+        http_client.get.return_value = meta_resp
 
         with pytest.raises(OAuthError, match="registration endpoint"):
             authorize("https://example.com/mcp")
@@ -1,22 +1,26 @@
 """Tests for the CLI module."""
 
+import httpx
 import json
 import pytest
-import subprocess
-import time
+import re
+import socket
 import sys
-import requests
-from pathlib import Path
-from click.testing import CliRunner
+from types import SimpleNamespace
 
-# Python 3.10 compatibility: ExceptionGroup was added in 3.11
+# orjson is optional: fall back to the stdlib so the tests run anywhere
 try:
-    ExceptionGroup
-except NameError:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+# Python 3.10 compatibility: ExceptionGroup was added in 3.11
+if sys.version_info < (3, 11):
     from exceptiongroup import ExceptionGroup
 
 from murl.cli import (
     main,
+    make_mcp_request,
     parse_url,
     parse_data_value,
     parse_data_flags,
@@ -26,214 +30,173 @@ from murl.cli import (
 from murl import __version__
 
 
-# Test server configuration
-TEST_SERVER_PORT = 8765
-TEST_SERVER_URL = f"http://localhost:{TEST_SERVER_PORT}"
+# Expected error messages, compiled once for pytest.raises(match=...)
+INVALID_URL_RE = re.compile("Invalid MCP URL")
+JSON_ARRAY_RE = re.compile("JSON arrays are not supported")
+INVALID_DATA_RE = re.compile("Invalid data format")
+INVALID_JSON_RE = re.compile("Invalid JSON")
+EMPTY_PATH_RE = re.compile("path cannot be empty")
+EMPTY_VIRTUAL_PATH_RE = re.compile("Invalid virtual path: empty path")
+INVALID_CATEGORY_RE = re.compile("Invalid MCP category: widgets")
+INVALID_HEADER_RE = re.compile("Invalid header format")
 
 
 def parse_ndjson(output):
-    """Parse NDJSON (one JSON object per line) output."""
-    return [json.loads(line) for line in output.strip().split('\n') if line.strip()]
-
-
-@pytest.fixture(scope="module")
-def mcp_server():
-    """Start the real MCP test server for integration tests."""
-    test_dir = Path(__file__).parent
-    server_script = test_dir / "mcp_test_server.py"
-
-    process = subprocess.Popen(
-        [sys.executable, str(server_script)],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-
-    import requests
-    max_retries = 10
-    retry_delay = 0.2
-
-    for attempt in range(max_retries):
-        if process.poll() is not None:
-            stdout, stderr = process.communicate()
-            pytest.fail(f"Server failed to start:\nSTDOUT: {stdout}\nSTDERR: {stderr}")
-
-        try:
-            response = requests.post(
-                TEST_SERVER_URL,
-                json={"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {}},
-                timeout=1
-            )
-            if response.status_code == 200:
-                break
-        except (requests.ConnectionError, requests.Timeout):
-            time.sleep(retry_delay)
-    else:
-        process.terminate()
-        pytest.fail(f"Server failed to start after {max_retries} attempts")
-
-    yield TEST_SERVER_URL
-
-    process.terminate()
-    try:
-        process.wait(timeout=5)
-    except subprocess.TimeoutExpired:
-        process.kill()
-        process.wait()
-
-
-# Test helper functions
-
-def test_parse_url_tools():
-    base, path = parse_url("http://localhost:3000/tools")
-    assert base == "http://localhost:3000"
-    assert path == "/tools"
-
-
-def test_parse_url_tools_with_name():
-    base, path = parse_url("http://localhost:3000/tools/weather")
-    assert base == "http://localhost:3000"
-    assert path == "/tools/weather"
-
-
-def test_parse_url_resources():
-    base, path = parse_url("https://api.example.com/mcp/resources")
-    assert base == "https://api.example.com/mcp"
-    assert path == "/resources"
-
-
-def test_parse_url_prompts():
-    base, path = parse_url("http://localhost:3000/prompts/greeting")
-    assert base == "http://localhost:3000"
-    assert path == "/prompts/greeting"
-
-
-def test_parse_url_invalid():
-    with pytest.raises(ValueError, match="Invalid MCP URL"):
-        parse_url("http://localhost:3000/invalid")
-
-
-def test_parse_data_value_boolean_true():
-    assert parse_data_value("true") is True
-    assert parse_data_value("True") is True
-
-
-def test_parse_data_value_boolean_false():
-    assert parse_data_value("false") is False
-    assert parse_data_value("False") is False
-
-
-def test_parse_data_value_integer():
-    assert parse_data_value("123") == 123
-    assert parse_data_value("-456") == -456
+    """Parse NDJSON (one JSON object per line) output, str or bytes."""
+    return [loads(line) for line in output.splitlines() if line]
 
 
-def test_parse_data_value_float():
-    assert parse_data_value("3.14") == 3.14
-    assert parse_data_value("-2.5") == -2.5
-
-
-def test_parse_data_value_string():
-    assert parse_data_value("hello") == "hello"
-    assert parse_data_value("world123") == "world123"
-
-
-def test_parse_data_flags_key_value():
-    result = parse_data_flags(("name=John", "age=30", "active=true"))
-    assert result == {"name": "John", "age": 30, "active": True}
-
-
-def test_parse_data_flags_json():
-    result = parse_data_flags(('{"city": "Paris", "metric": true}',))
-    assert result == {"city": "Paris", "metric": True}
-
-
-def test_parse_data_flags_json_array_error():
-    with pytest.raises(ValueError, match="JSON arrays are not supported"):
-        parse_data_flags(('[1, 2, 3]',))
-
-
-def test_parse_data_flags_mixed():
-    result = parse_data_flags(("name=Alice", '{"age": 25}'))
-    assert result == {"name": "Alice", "age": 25}
-
-
-def test_parse_data_flags_invalid_format():
-    with pytest.raises(ValueError, match="Invalid data format"):
-        parse_data_flags(("invalid",))
-
-
-def test_parse_data_flags_invalid_json():
-    with pytest.raises(ValueError, match="Invalid JSON"):
-        parse_data_flags(('{"invalid": json}',))
-
-
-def test_map_tools_list():
-    method, params = map_virtual_path_to_method("/tools", {})
-    assert method == "tools/list"
-    assert params == {}
-
-
-def test_map_tools_call():
-    data = {"message": "hello"}
-    method, params = map_virtual_path_to_method("/tools/echo", data)
-    assert method == "tools/call"
-    assert params == {"name": "echo", "arguments": {"message": "hello"}}
-
-
-def test_map_resources_list():
-    method, params = map_virtual_path_to_method("/resources", {})
-    assert method == "resources/list"
-    assert params == {}
-
-
-def test_map_resources_read():
-    method, params = map_virtual_path_to_method("/resources/path/to/file", {})
-    assert method == "resources/read"
-    assert params == {"uri": "file:///path/to/file"}
+def run_cli(args, capsys):
+    """Run murl in-process without CliRunner; return (exit code, stdout, stderr).
 
+    For invocations that need no stdin or isolation, e.g. flag handling
+    and argument errors.
+    """
+    try:
+        code = main.main(args, prog_name="murl", standalone_mode=False)
+    except SystemExit as e:
+        code = e.code
+    out, err = capsys.readouterr()
+    return code or 0, out, err
 
-def test_map_resources_read_with_additional_params():
-    data = {"format": "json", "encoding": "utf-8"}
-    method, params = map_virtual_path_to_method("/resources/path/to/file", data)
-    assert method == "resources/read"
-    assert params == {"uri": "file:///path/to/file", "format": "json", "encoding": "utf-8"}
 
+def record_calls(monkeypatch, target, return_value=None):
+    """Replace *target* with a stub returning *return_value*; return its call log."""
+    calls = []
 
-def test_map_resources_read_empty_path():
-    with pytest.raises(ValueError, match="path cannot be empty"):
-        map_virtual_path_to_method("/resources/", {})
+    def stub(*args, **kwargs):
+        calls.append((args, kwargs))
+        return return_value
 
+    monkeypatch.setattr(target, stub)
+    return calls
 
-def test_map_resources_read_with_special_characters():
-    method, params = map_virtual_path_to_method("/resources/path/to/my%20file.txt", {})
-    assert method == "resources/read"
-    assert params == {"uri": "file:///path/to/my%20file.txt"}
 
+def fail_request(monkeypatch, exc):
+    """Make every MCP request raise *exc*, as the transport would."""
+    def stub(*args, **kwargs):
+        raise exc
 
-def test_map_resources_read_with_multiple_slashes():
-    method, params = map_virtual_path_to_method("/resources/path//to///file", {})
-    assert method == "resources/read"
-    assert params == {"uri": "file:///path//to///file"}
+    monkeypatch.setattr("murl.cli.make_mcp_request", stub)
 
 
-def test_map_resources_read_relative_path():
-    method, params = map_virtual_path_to_method("/resources/relative/path", {})
-    assert method == "resources/read"
-    assert params == {"uri": "file:///relative/path"}
+def assert_ndjson_list(result, length, checks=()):
+    """Check a successful list result, parsing its raw stdout only once.
 
+    ``checks`` holds ``(index, key, expected)`` tuples.
+    """
+    assert result.exit_code == 0
+    objs = parse_ndjson(result.stdout_bytes)
+    assert len(objs) == length
+    for index, key, expected in checks:
+        assert objs[index][key] == expected
+    return objs
 
-def test_map_prompts_list():
-    method, params = map_virtual_path_to_method("/prompts", {})
-    assert method == "prompts/list"
-    assert params == {}
 
+# Test helper functions
 
-def test_map_prompts_get():
-    data = {"variable": "value"}
-    method, params = map_virtual_path_to_method("/prompts/greeting", data)
-    assert method == "prompts/get"
-    assert params == {"name": "greeting", "arguments": {"variable": "value"}}
+@pytest.mark.parametrize("url,expected_base,expected_path", [
+    ("http://localhost:3000/tools", "http://localhost:3000", "/tools"),
+    ("http://localhost:3000/tools/weather", "http://localhost:3000", "/tools/weather"),
+    ("https://api.example.com/mcp/resources", "https://api.example.com/mcp", "/resources"),
+    ("http://localhost:3000/prompts/greeting", "http://localhost:3000", "/prompts/greeting"),
+])
+def test_parse_url(url, expected_base, expected_path):
+    assert parse_url(url) == (expected_base, expected_path)
+
+
+@pytest.mark.parametrize("url", [
+    "http://localhost:3000/invalid",
+    "http://localhost:3000/",
+    "http://localhost:3000/toolsx",
+])
+def test_parse_url_invalid(url):
+    with pytest.raises(ValueError, match=INVALID_URL_RE):
+        parse_url(url)
+
+
+@pytest.mark.parametrize("raw,expected", [
+    ("true", True),
+    ("True", True),
+    ("false", False),
+    ("False", False),
+    ("123", 123),
+    ("-456", -456),
+    ("+7", 7),
+    ("3.14", 3.14),
+    ("-2.5", -2.5),
+    (".5", 0.5),
+    ("1.5e3", 1500.0),
+    ("hello", "hello"),
+    ("world123", "world123"),
+    ("1.2.3", "1.2.3"),
+    ("1e5", "1e5"),
+    ("", ""),
+    (" 5", 5),
+    ("5 ", 5),
+    ("5\n", 5),
+    ("1_000", 1000),
+    ("1_0.5", 10.5),
+    (" 2.5\t", 2.5),
+    ("1__0", "1__0"),
+    ("_1", "_1"),
+    (" true", " true"),
+])
+def test_parse_data_value(raw, expected):
+    result = parse_data_value(raw)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+@pytest.mark.parametrize("data_flags,expected", [
+    (("name=John", "age=30", "active=true"), {"name": "John", "age": 30, "active": True}),
+    (('{"city": "Paris", "metric": true}',), {"city": "Paris", "metric": True}),
+    (("name=Alice", '{"age": 25}'), {"name": "Alice", "age": 25}),
+])
+def test_parse_data_flags(data_flags, expected):
+    assert parse_data_flags(data_flags) == expected
+
+
+@pytest.mark.parametrize("data_flags,pattern", [
+    (('[1, 2, 3]',), JSON_ARRAY_RE),
+    (("invalid",), INVALID_DATA_RE),
+    (('{"invalid": json}',), INVALID_JSON_RE),
+])
+def test_parse_data_flags_errors(data_flags, pattern):
+    with pytest.raises(ValueError, match=pattern):
+        parse_data_flags(data_flags)
+
+
+@pytest.mark.parametrize("path,data,expected_method,expected_params", [
+    ("/tools", {}, "tools/list", {}),
+    ("/tools/echo", {"message": "hello"}, "tools/call",
+     {"name": "echo", "arguments": {"message": "hello"}}),
+    ("/resources", {}, "resources/list", {}),
+    ("/resources/path/to/file", {}, "resources/read", {"uri": "file:///path/to/file"}),
+    ("/resources/path/to/file", {"format": "json", "encoding": "utf-8"}, "resources/read",
+     {"uri": "file:///path/to/file", "format": "json", "encoding": "utf-8"}),
+    ("/resources/path/to/my%20file.txt", {}, "resources/read",
+     {"uri": "file:///path/to/my%20file.txt"}),
+    ("/resources/path//to///file", {}, "resources/read", {"uri": "file:///path//to///file"}),
+    ("/resources/relative/path", {}, "resources/read", {"uri": "file:///relative/path"}),
+    ("/prompts", {}, "prompts/list", {}),
+    ("/prompts/greeting", {"variable": "value"}, "prompts/get",
+     {"name": "greeting", "arguments": {"variable": "value"}}),
+])
+def test_map_virtual_path(path, data, expected_method, expected_params):
+    method, params = map_virtual_path_to_method(path, data)
+    assert method == expected_method
+    assert params == expected_params
+
+
+@pytest.mark.parametrize("path,pattern", [
+    ("/resources/", EMPTY_PATH_RE),
+    ("/", EMPTY_VIRTUAL_PATH_RE),
+    ("/widgets", INVALID_CATEGORY_RE),
+])
+def test_map_virtual_path_errors(path, pattern):
+    with pytest.raises(ValueError, match=pattern):
+        map_virtual_path_to_method(path, {})
 
 
 def test_parse_headers():
@@ -245,33 +208,43 @@ def test_parse_headers():
 
 
 def test_parse_headers_invalid():
-    with pytest.raises(ValueError, match="Invalid header format"):
+    with pytest.raises(ValueError, match=INVALID_HEADER_RE):
         parse_headers(("InvalidHeader",))
 
 
 # Integration tests with real MCP server
 # Default output: compact NDJSON (one JSON object per line)
 
-def test_cli_list_tools(mcp_server):
-    """Test listing tools outputs NDJSON by default."""
-    runner = CliRunner()
-    result = runner.invoke(main, [f"{mcp_server}/tools", "--no-auth"])
-
-    assert result.exit_code == 0
-    output = parse_ndjson(result.output)
-    assert len(output) == 2
-    assert output[0]["name"] == "echo"
-    assert output[1]["name"] == "weather"
+@pytest.fixture(scope="module")
+def list_tools_result(mcp_server, runner):
+    """Result of listing the test server's tools, invoked once per module."""
+    return runner.invoke(main, [f"{mcp_server}/tools", "--no-auth"])
 
 
-def test_cli_call_tool_with_data(mcp_server):
-    runner = CliRunner()
-    result = runner.invoke(main, [
+@pytest.fixture(scope="module")
+def echo_result(mcp_server, runner):
+    """Result of calling the echo tool with message=hello, invoked once per module."""
+    return runner.invoke(main, [
         f"{mcp_server}/tools/echo",
         "-d", "message=hello",
         "--no-auth"
     ])
 
+
+@pytest.fixture(scope="module")
+def verbose_tools_result(mcp_server, runner):
+    """Result of listing the test server's tools with -v, invoked once per module."""
+    return runner.invoke(main, [f"{mcp_server}/tools", "-v", "--no-auth"])
+
+
+def test_cli_list_tools(list_tools_result):
+    """Test listing tools outputs NDJSON by default."""
+    assert_ndjson_list(list_tools_result, 2, [(0, "name", "echo"), (1, "name", "weather")])
+
+
+def test_cli_call_tool_with_data(echo_result):
+    result = echo_result
+
     assert result.exit_code == 0
     output = parse_ndjson(result.output)
     assert len(output) > 0
@@ -279,8 +252,7 @@ def test_cli_call_tool_with_data(mcp_server):
     assert output[0]["text"] == "hello"
 
 
-def test_cli_call_weather_tool(mcp_server):
-    runner = CliRunner()
+def test_cli_call_weather_tool(mcp_server, runner):
     result = runner.invoke(main, [
         f"{mcp_server}/tools/weather",
         "-d", "city=Paris",
@@ -295,18 +267,13 @@ def test_cli_call_weather_tool(mcp_server):
     assert "Paris" in output[0]["text"]
 
 
-def test_cli_list_resources(mcp_server):
-    runner = CliRunner()
+def test_cli_list_resources(mcp_server, runner):
     result = runner.invoke(main, [f"{mcp_server}/resources", "--no-auth"])
 
-    assert result.exit_code == 0
-    output = parse_ndjson(result.output)
-    assert len(output) == 2
-    assert output[0]["uri"] == "file:///path/to/file1.txt"
+    assert_ndjson_list(result, 2, [(0, "uri", "file:///path/to/file1.txt")])
 
 
-def test_cli_read_resource(mcp_server):
-    runner = CliRunner()
+def test_cli_read_resource(mcp_server, runner):
     result = runner.invoke(main, [f"{mcp_server}/resources/test.txt", "--no-auth"])
 
     assert result.exit_code == 0
@@ -316,18 +283,13 @@ def test_cli_read_resource(mcp_server):
     assert output[0]["text"] == "Mock file content"
 
 
-def test_cli_list_prompts(mcp_server):
-    runner = CliRunner()
+def test_cli_list_prompts(mcp_server, runner):
     result = runner.invoke(main, [f"{mcp_server}/prompts", "--no-auth"])
 
-    assert result.exit_code == 0
-    output = parse_ndjson(result.output)
-    assert len(output) == 2
-    assert output[0]["name"] == "greeting"
+    assert_ndjson_list(result, 2, [(0, "name", "greeting")])
 
 
-def test_cli_get_prompt(mcp_server):
-    runner = CliRunner()
+def test_cli_get_prompt(mcp_server, runner):
     result = runner.invoke(main, [
         f"{mcp_server}/prompts/greeting",
         "-d", "name=Alice",
@@ -341,22 +303,18 @@ def test_cli_get_prompt(mcp_server):
     assert "Alice" in output[0]["content"]["text"]
 
 
-def test_cli_with_headers(mcp_server):
-    runner = CliRunner()
+def test_cli_with_headers(mcp_server, runner):
     result = runner.invoke(main, [
         f"{mcp_server}/prompts",
         "-H", "Authorization: Bearer token123"
     ])
 
-    assert result.exit_code == 0
-    output = parse_ndjson(result.output)
-    assert len(output) == 2
+    assert_ndjson_list(result, 2)
 
 
-def test_cli_verbose_mode(mcp_server):
+def test_cli_verbose_mode(verbose_tools_result):
     """Test -v outputs pretty-printed JSON and debug info."""
-    runner = CliRunner()
-    result = runner.invoke(main, [f"{mcp_server}/tools", "-v", "--no-auth"])
+    result = verbose_tools_result
 
     assert result.exit_code == 0
     # Verbose mixes debug info (stderr) and pretty JSON (stdout) in CliRunner
@@ -365,8 +323,7 @@ def test_cli_verbose_mode(mcp_server):
     assert '  ' in result.output
 
 
-def test_cli_json_data(mcp_server):
-    runner = CliRunner()
+def test_cli_json_data(mcp_server, runner):
     result = runner.invoke(main, [
         f"{mcp_server}/tools/echo",
         "-d", '{"message": "complex json"}',
@@ -382,115 +339,133 @@ def test_cli_json_data(mcp_server):
 
 # Error tests — all errors are structured JSON by default
 
-def test_cli_connection_error():
+def test_cli_connection_error(runner, monkeypatch):
     """Test connection error outputs structured JSON."""
-    runner = CliRunner()
+    connect_exc = httpx.ConnectError("All connection attempts failed")
+    fail_request(monkeypatch, ExceptionGroup("unhandled errors in a TaskGroup", [connect_exc]))
+
     result = runner.invoke(main, ["http://localhost:9999/tools", "--no-auth"])
 
     assert result.exit_code == 1
-    error_obj = json.loads(result.output.strip())
+    error_obj = loads(result.output.strip())
     assert error_obj["error"] == "CONNECTION_REFUSED"
     assert "Connection refused" in error_obj["message"]
 
 
-def test_cli_dns_resolution_error():
+def test_cli_dns_resolution_error(runner, monkeypatch):
     """Test DNS error outputs structured JSON."""
-    runner = CliRunner()
+    dns_exc = httpx.ConnectError("[Errno -2] Name or service not known")
+    fail_request(monkeypatch, ExceptionGroup("unhandled errors in a TaskGroup", [dns_exc]))
+
     result = runner.invoke(main, ["https://invalid-server.test/tools", "--no-auth"])
 
     assert result.exit_code == 1
-    error_obj = json.loads(result.output.strip())
+    error_obj = loads(result.output.strip())
     assert error_obj["error"] == "DNS_RESOLUTION_FAILED"
     assert "DNS resolution failed" in error_obj["message"]
+    assert "invalid-server.test" in error_obj["message"]
 
 
-def test_cli_timeout_error():
-    """Test timeout error outputs structured JSON."""
-    from unittest.mock import patch
+@pytest.mark.network
+def test_cli_connection_error_real(runner):
+    """Connection refused is classified from the real transport error."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
 
-    runner = CliRunner()
+    result = runner.invoke(main, [f"http://127.0.0.1:{port}/tools", "--no-auth"])
 
-    with patch("murl.cli.make_mcp_request") as mock_request:
-        timeout_exc = TimeoutError("Request timed out")
-        mock_request.side_effect = ExceptionGroup("unhandled errors in a TaskGroup", [timeout_exc])
+    assert result.exit_code == 1
+    assert loads(result.output.strip())["error"] == "CONNECTION_REFUSED"
+
+
+@pytest.mark.network
+def test_cli_dns_resolution_error_real(runner):
+    """DNS failure is classified from the real resolver error."""
+    result = runner.invoke(main, ["https://invalid-server.test/tools", "--no-auth"])
+
+    assert result.exit_code == 1
+    assert loads(result.output.strip())["error"] == "DNS_RESOLUTION_FAILED"
 
-        result = runner.invoke(main, ["http://localhost:8765/tools", "--no-auth"])
+
+def test_cli_timeout_error(runner, monkeypatch):
+    """Test timeout error outputs structured JSON."""
+    timeout_exc = TimeoutError("Request timed out")
+    fail_request(monkeypatch, ExceptionGroup("unhandled errors in a TaskGroup", [timeout_exc]))
+
+    result = runner.invoke(main, ["http://localhost:8765/tools", "--no-auth"])
 
     assert result.exit_code == 1
-    error_obj = json.loads(result.output.strip())
+    error_obj = loads(result.output.strip())
     assert error_obj["error"] == "TIMEOUT"
     assert "timeout" in error_obj["message"].lower()
 
 
-def test_cli_generic_connect_error():
+def test_cli_generic_connect_error(runner, monkeypatch):
     """Test generic ConnectError outputs structured JSON."""
-    from unittest.mock import patch
+    class ConnectError(Exception):
+        pass
 
-    runner = CliRunner()
+    connect_exc = ConnectError("Some other network error")
+    fail_request(monkeypatch, ExceptionGroup("unhandled errors in a TaskGroup", [connect_exc]))
 
-    with patch("murl.cli.make_mcp_request") as mock_request:
-        class ConnectError(Exception):
-            pass
-
-        connect_exc = ConnectError("Some other network error")
-        mock_request.side_effect = ExceptionGroup("unhandled errors in a TaskGroup", [connect_exc])
-
-        result = runner.invoke(main, ["http://localhost:8765/tools", "--no-auth"])
+    result = runner.invoke(main, ["http://localhost:8765/tools", "--no-auth"])
 
     assert result.exit_code == 1
-    error_obj = json.loads(result.output.strip())
+    error_obj = loads(result.output.strip())
     assert "Some other network error" in error_obj["message"]
 
 
-def test_cli_invalid_url():
+def test_cli_invalid_url(capsys):
     """Test invalid URL outputs structured JSON error."""
-    runner = CliRunner()
-    result = runner.invoke(main, ["http://localhost:3000/invalid"])
+    code, _, err = run_cli(["http://localhost:3000/invalid"], capsys)
 
-    assert result.exit_code == 2
-    error_obj = json.loads(result.output.strip())
+    assert code == 2
+    error_obj = loads(err)
     assert error_obj["error"] == "INVALID_ARGUMENT"
     assert "Invalid MCP URL" in error_obj["message"]
 
 
 # Flag tests
 
-def test_version_option():
-    runner = CliRunner()
-    result = runner.invoke(main, ["--version"])
-    assert result.exit_code == 0
-    assert __version__ in result.output
+def test_version_option(capsys):
+    code, out, _ = run_cli(["--version"], capsys)
+    assert code == 0
+    assert __version__ in out
 
 
-def test_help():
+def test_help(capsys):
     """Test --help shows concise help."""
-    runner = CliRunner()
-    result = runner.invoke(main, ["--help"])
-    assert result.exit_code == 0
-    assert "USAGE:" in result.output
-    assert "EXAMPLES:" in result.output
-    assert "AUTHENTICATION:" in result.output
-    assert "--login" in result.output
-    assert "--no-auth" in result.output
+    code, out, _ = run_cli(["--help"], capsys)
+    assert code == 0
+    assert "USAGE:" in out
+    assert "EXAMPLES:" in out
+    assert "AUTHENTICATION:" in out
+    assert "--login" in out
+    assert "--no-auth" in out
 
 
-def test_upgrade_option():
-    from unittest.mock import patch, MagicMock
+# pip invocation murl --upgrade is expected to make
+PIP_UPGRADE_ARGS = [sys.executable, "-m", "pip", "install", "--upgrade", "mcp-curl"]
 
-    runner = CliRunner()
 
-    mock_result = MagicMock()
-    mock_result.returncode = 0
-    mock_result.stdout = "Successfully installed mcp-curl-0.2.1"
-    mock_result.stderr = ""
+@pytest.fixture
+def mock_pip(monkeypatch):
+    """Replace subprocess.run with a recorder returning a successful pip run."""
+    return record_calls(monkeypatch, "murl.cli.subprocess.run", return_value=SimpleNamespace(
+        returncode=0,
+        stdout="Successfully installed mcp-curl-0.2.1",
+        stderr="",
+    ))
 
-    with patch('subprocess.run', return_value=mock_result) as mock_run:
-        result = runner.invoke(main, ["--upgrade"])
 
-        mock_run.assert_called_once()
-        call_args = mock_run.call_args
-        assert call_args[0][0] == [sys.executable, "-m", "pip", "install", "--upgrade", "mcp-curl"]
-        assert call_args[1]['timeout'] == 300
+def test_upgrade_option(runner, mock_pip):
+    result = runner.invoke(main, ["--upgrade"])
+
+    assert len(mock_pip) == 1
+    args, kwargs = mock_pip[0]
+    assert args[0] == PIP_UPGRADE_ARGS
+    assert kwargs['timeout'] == 300
 
     assert result.exit_code == 0
     assert "Upgrading murl" in result.output
@@ -499,74 +474,69 @@ def test_upgrade_option():
 
 # Default output format tests
 
-def test_default_list_output_is_ndjson(mcp_server):
+def test_default_list_output_is_ndjson(list_tools_result):
     """Default output for lists is compact NDJSON (one JSON object per line)."""
-    runner = CliRunner()
-    result = runner.invoke(main, [f"{TEST_SERVER_URL}/tools", "--no-auth"])
+    result = list_tools_result
 
     assert result.exit_code == 0
-    lines = result.output.strip().split('\n')
-    assert len(lines) > 0
-
-    for line in lines:
-        obj = json.loads(line)
-        assert isinstance(obj, dict)
-        # Compact: no whitespace after separators
-        assert ', ' not in line and '": ' not in line
+    lines = result.output.splitlines()
+    records = [loads(line) for line in lines]
+    assert records
+    assert all(isinstance(r, dict) for r in records)
+    # Compact: every line is exactly its record re-serialized without spaces
+    assert lines == [json.dumps(r, separators=(',', ':')) for r in records]
 
 
-def test_default_single_output_is_compact(mcp_server):
+def test_default_single_output_is_compact(echo_result):
     """Default output for single results is compact JSON."""
-    runner = CliRunner()
-    result = runner.invoke(main, [f"{TEST_SERVER_URL}/tools/echo", "-d", "message=test", "--no-auth"])
+    result = echo_result
 
     assert result.exit_code == 0
-    assert '  ' not in result.output  # No indentation
-    lines = result.output.strip().split('\n')
-    for line in lines:
-        obj = json.loads(line)
-        assert isinstance(obj, dict)
+    lines = result.output.splitlines()
+    records = [loads(line) for line in lines]
+    assert all(isinstance(r, dict) for r in records)
+    # No indentation or separator spaces
+    assert lines == [json.dumps(r, separators=(',', ':')) for r in records]
 
 
-def test_default_error_is_structured_json():
+def test_default_error_is_structured_json(runner):
     """Default error output is structured JSON on stderr."""
-    runner = CliRunner()
     result = runner.invoke(main, ["http://localhost:3000/invalid"])
 
     assert result.exit_code == 2
-    error_obj = json.loads(result.output.strip())
+    error_obj = loads(result.output.strip())
     assert "error" in error_obj
     assert "message" in error_obj
     assert "code" in error_obj
     assert error_obj["code"] == 2
 
 
-def test_default_connection_error_is_structured():
+def test_default_connection_error_is_structured(runner, monkeypatch):
     """Default connection error is structured JSON."""
-    runner = CliRunner()
+    connect_exc = httpx.ConnectError("All connection attempts failed")
+    fail_request(monkeypatch, ExceptionGroup("unhandled errors in a TaskGroup", [connect_exc]))
+
     result = runner.invoke(main, ["http://localhost:19999/tools", "--no-auth"])
 
     assert result.exit_code == 1
-    error_obj = json.loads(result.output.strip())
+    error_obj = loads(result.output.strip())
     assert "error" in error_obj
     assert error_obj["error"] in ["CONNECTION_REFUSED", "CONNECTION_ERROR"]
 
 
-def test_default_missing_url_is_structured():
+def test_default_missing_url_is_structured(capsys):
     """Missing URL produces structured JSON error."""
-    runner = CliRunner()
-    result = runner.invoke(main, [])
+    code, _, err = run_cli([], capsys)
 
-    assert result.exit_code == 2
-    error_obj = json.loads(result.output.strip())
+    assert code == 2
+    error_obj = loads(err)
     assert error_obj["error"] == "MISSING_ARGUMENT"
     assert "URL argument is required" in error_obj["message"]
 
 
-def test_verbose_output_is_pretty_printed(mcp_server):
+def test_verbose_output_is_pretty_printed(verbose_tools_result):
     """Verbose mode outputs pretty-printed JSON (with indentation)."""
-    runner = CliRunner()
-    result = runner.invoke(main, [f"{TEST_SERVER_URL}/tools", "-v", "--no-auth"])
+    result = verbose_tools_result
 
     assert result.exit_code == 0
     assert '  ' in result.output  # Has indentation
@@ -574,9 +544,8 @@ def test_verbose_output_is_pretty_printed(mcp_server):
 
 # OAuth CLI integration tests
 
-def test_cli_login_triggers_oauth(mcp_server):
+def test_cli_login_triggers_oauth(mcp_server, runner, monkeypatch):
     """--login clears stored creds, runs OAuth, stores new creds, and makes request."""
-    from unittest.mock import patch, MagicMock
     import time as _time
 
     fake_creds = {
@@ -589,22 +558,21 @@ def test_cli_login_triggers_oauth(mcp_server):
         "server_url": "http://localhost",
     }
 
-    runner = CliRunner()
-    with patch("murl.cli.clear_credentials") as mock_clear, \
-         patch("murl.cli.get_credentials", return_value=None), \
-         patch("murl.cli.authorize", return_value=fake_creds) as mock_auth, \
-         patch("murl.cli.save_credentials") as mock_save:
-        result = runner.invoke(main, [f"{TEST_SERVER_URL}/tools", "--login"])
+    clear_calls = record_calls(monkeypatch, "murl.cli.clear_credentials")
+    record_calls(monkeypatch, "murl.cli.get_credentials", return_value=None)
+    auth_calls = record_calls(monkeypatch, "murl.cli.authorize", return_value=fake_creds)
+    save_calls = record_calls(monkeypatch, "murl.cli.save_credentials")
+
+    result = runner.invoke(main, [f"{mcp_server}/tools", "--login"])
 
-    assert mock_clear.called, "clear_credentials should be called with --login"
-    assert mock_auth.called, "authorize should be called with --login"
-    assert mock_save.called, "save_credentials should be called after OAuth"
+    assert clear_calls, "clear_credentials should be called with --login"
+    assert auth_calls, "authorize should be called with --login"
+    assert save_calls, "save_credentials should be called after OAuth"
     assert result.exit_code == 0
 
 
-def test_cli_stored_creds_used_without_login(mcp_server):
+def test_cli_stored_creds_used_without_login(mcp_server, runner, monkeypatch):
     """Valid stored credentials are injected as Authorization header without prompting OAuth."""
-    from unittest.mock import patch
     import time as _time
 
     fake_creds = {
@@ -612,19 +580,18 @@ def test_cli_stored_creds_used_without_login(mcp_server):
         "expires_at": _time.time() + 3600,
     }
 
-    runner = CliRunner()
-    with patch("murl.cli.get_credentials", return_value=fake_creds), \
-         patch("murl.cli.is_expired", return_value=False), \
-         patch("murl.cli.authorize") as mock_auth:
-        result = runner.invoke(main, [f"{TEST_SERVER_URL}/tools"])
+    record_calls(monkeypatch, "murl.cli.get_credentials", return_value=fake_creds)
+    record_calls(monkeypatch, "murl.cli.is_expired", return_value=False)
+    auth_calls = record_calls(monkeypatch, "murl.cli.authorize")
+
+    result = runner.invoke(main, [f"{mcp_server}/tools"])
 
-    assert not mock_auth.called, "authorize should NOT be called when valid creds exist"
+    assert not auth_calls, "authorize should NOT be called when valid creds exist"
     assert result.exit_code == 0
 
 
-def test_cli_401_retry_triggers_oauth(mcp_server):
+def test_cli_401_retry_triggers_oauth(mcp_server, runner, monkeypatch):
     """A 401 error on first request triggers OAuth and retries."""
-    from unittest.mock import patch
     import time as _time
 
     fake_creds = {
@@ -638,35 +605,33 @@ def test_cli_401_retry_triggers_oauth(mcp_server):
     }
 
     call_count = [0]
-    original_make_mcp_request = None
+    real_make_mcp_request = make_mcp_request
 
-    async def mock_make_mcp_request(*args, **kwargs):
+    async def fake_make_mcp_request(*args, **kwargs):
         call_count[0] += 1
         if call_count[0] == 1:
             raise Exception("HTTP 401 Unauthorized")
-        # Import the real function and call it for the retry
-        from murl.cli import make_mcp_request as real_fn
-        return await real_fn(*args, **kwargs)
+        # The retry goes to the real server
+        return await real_make_mcp_request(*args, **kwargs)
 
-    runner = CliRunner()
-    with patch("murl.cli.make_mcp_request", side_effect=mock_make_mcp_request), \
-         patch("murl.cli.authorize", return_value=fake_creds) as mock_auth, \
-         patch("murl.cli.save_credentials"):
-        result = runner.invoke(main, [f"{TEST_SERVER_URL}/tools"])
+    monkeypatch.setattr("murl.cli.make_mcp_request", fake_make_mcp_request)
+    auth_calls = record_calls(monkeypatch, "murl.cli.authorize", return_value=fake_creds)
+    record_calls(monkeypatch, "murl.cli.save_credentials")
 
-    assert mock_auth.called, "authorize should be called after 401"
-    assert call_count[0] >= 2, "Should retry after 401"
+    result = runner.invoke(main, [f"{mcp_server}/tools"])
+
+    assert auth_calls, "authorize should be called after 401"
+    assert call_count[0] == 2, "Should retry once after 401"
+    assert result.exit_code == 0
 
 
-def test_cli_no_auth_skips_all_auth(mcp_server):
+def test_cli_no_auth_skips_all_auth(mcp_server, runner, monkeypatch):
     """--no-auth skips credential loading and OAuth entirely."""
-    from unittest.mock import patch
+    get_calls = record_calls(monkeypatch, "murl.cli.get_credentials")
+    auth_calls = record_calls(monkeypatch, "murl.cli.authorize")
 
-    runner = CliRunner()
-    with patch("murl.cli.get_credentials") as mock_get, \
-         patch("murl.cli.authorize") as mock_auth:
-        result = runner.invoke(main, [f"{TEST_SERVER_URL}/tools", "--no-auth"])
+    result = runner.invoke(main, [f"{mcp_server}/tools", "--no-auth"])
 
-    assert not mock_get.called, "get_credentials should NOT be called with --no-auth"
-    assert not mock_auth.called, "authorize should NOT be called with --no-auth"
+    assert not get_calls, "get_credentials should NOT be called with --no-auth"
+    assert not auth_calls, "authorize should NOT be called with --no-auth"
     assert result.exit_code == 0
@@ -0,0 +1,62 @@
+"""Tests for the MCP test server's batch and request-size handling.
+
+murl itself only sends single requests, so these paths are exercised by
+posting raw JSON-RPC to the in-process test server.
+"""
+
+import httpx
+import pytest
+
+from .mcp_test_server import MCPJSONRPCHandler
+
+
+def rpc(request_id, method, params=None):
+    """Build one JSON-RPC request; a None id makes it a notification."""
+    message = {"jsonrpc": "2.0", "method": method, "params": params or {}}
+    if request_id is not None:
+        message["id"] = request_id
+    return message
+
+
+def test_batch_answers_each_request_in_order(mcp_server):
+    batch = [
+        rpc(1, "tools/list"),
+        rpc(None, "notifications/initialized"),
+        rpc(2, "tools/call", {"name": "echo", "arguments": {"message": "hi"}}),
+        rpc(3, "no/such/method"),
+    ]
+
+    response = httpx.post(mcp_server, json=batch)
+
+    assert response.status_code == 200
+    replies = response.json()
+    # The notification gets no entry in the batch reply
+    assert [reply["id"] for reply in replies] == [1, 2, 3]
+    assert replies[0]["result"]["tools"][0]["name"] == "echo"
+    assert replies[1]["result"]["content"][0]["text"] == "hi"
+    assert replies[2]["error"]["code"] == -32601
+
+
+def test_batch_of_notifications_is_accepted(mcp_server):
+    response = httpx.post(mcp_server, json=[rpc(None, "notifications/initialized")] * 2)
+
+    assert response.status_code == 202
+    assert response.content == b""
+
+
+@pytest.mark.parametrize("size", [0, MCPJSONRPCHandler.MAX_BATCH_SIZE + 1])
+def test_empty_or_oversized_batch_is_invalid(mcp_server, size):
+    response = httpx.post(mcp_server, json=[rpc(1, "tools/list")] * size)
+
+    assert response.status_code == 200
+    reply = response.json()
+    assert reply["id"] is None
+    assert reply["error"]["code"] == -32600
+
+
+def test_oversized_body_is_rejected(mcp_server, monkeypatch):
+    monkeypatch.setattr(MCPJSONRPCHandler, "MAX_BODY_SIZE", 16)
+
+    response = httpx.post(mcp_server, json=rpc(1, "tools/list"))
+
+    assert response.status_code == 413
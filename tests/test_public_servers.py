@@ -0,0 +1,94 @@
+"""Optional integration tests for public MCP servers.
+
+These tests validate connectivity to public MCP servers. Every server in
+SERVERS runs the same checks against a single shared tools listing.
+They are deselected by default; run them with ``pytest -m network``.
+They are bound by network latency, so run them in parallel with
+``pytest -m network -n auto --dist loadgroup``: each server's tests stay on
+one worker (and share its reachability probe) while servers run concurrently.
+"""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+from murl.cli import main
+
+# orjson is optional: fall back to the stdlib so the tests run anywhere
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+
+pytestmark = pytest.mark.network
+
+
+# Public MCP server configurations: (display name, URL, extra murl arguments)
+SERVERS = [
+    pytest.param(
+        ("Fetch", "https://remote.mcpservers.org/fetch/mcp", ["--no-auth"]),
+        id="fetch",
+        marks=pytest.mark.xdist_group("fetch"),
+    ),
+    pytest.param(
+        ("DeepWiki", "https://mcp.deepwiki.com/mcp", ["--no-auth"]),
+        id="deepwiki",
+        marks=pytest.mark.xdist_group("deepwiki"),
+    ),
+]
+
+
+def parse_ndjson_array(output: str) -> list:
+    """Parse NDJSON output in one call by joining the lines into a JSON array."""
+    return loads("[" + ",".join(line for line in output.splitlines() if line.strip()) + "]")
+
+
+@pytest.fixture(scope="module", params=SERVERS)
+def tools_result(request, require_reachable):
+    """Result of listing a public server's tools, invoked once per server."""
+    name, url, extra = request.param
+    require_reachable(url, name)
+    return CliRunner().invoke(main, [f"{url}/tools", *extra])
+
+
+def test_list_tools(tools_result):
+    """Test listing tools from a public server.
+
+    This test validates that murl can connect to and interact with
+    the public MCP server.
+    """
+    result = tools_result
+
+    # The test should succeed if the server is reachable
+    # If it fails, we want to see the output for debugging
+    if result.exit_code != 0:
+        pytest.skip(f"Server returned error: {result.output}")
+
+    # Verify we got valid NDJSON response (one JSON object per line)
+    try:
+        output = parse_ndjson_array(result.output)
+        assert isinstance(output, list) and len(output) > 0, "Expected at least one tool"
+    except json.JSONDecodeError as e:
+        pytest.fail(f"Invalid JSON response: {e}\nOutput: {result.output}")
+
+
+def test_connectivity(tools_result):
+    """Test basic connectivity to a public server.
+
+    This is a lightweight test that just verifies the server responds.
+    """
+    result = tools_result
+
+    # Check exit code first - connection failures typically result in non-zero codes
+    # Exit code 0 means success, exit code 1 may indicate server-side issues but connection worked
+    if result.exit_code not in [0, 1]:
+        pytest.skip(f"Server connection failed with exit code {result.exit_code}")
+
+    # If exit code is good, verify we got some NDJSON response
+    if result.exit_code == 0:
+        try:
+            lines = parse_ndjson_array(result.output)
+            assert len(lines) > 0
+        except json.JSONDecodeError:
+            pytest.skip(f"Server returned non-JSON response: {result.output[:100]}")